@@ -1,18 +1,21 @@
 #!/usr/bin/env python3
 """
 Script to download all PDFs listed in a CSV by calling download_michigan_pdf
-from `download_pdf.py` for each row.
+from `download_pdf.py` for each row. Downloads run concurrently on a small
+thread pool (see --workers).
 
 Expected CSV headers:
 generated_filename,agency_name,agency_id,FileExtension,CreatedDate,Title,ContentBodyId,Id,ContentDocumentId
 
 Usage:
-python download_all_pdfs.py --csv /path/to/file.csv --output-dir ./pdfs
+python download_all_pdfs.py --csv /path/to/file.csv --output-dir ./pdfs [--workers 4]
 """
 import csv
 import os
 import argparse
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional
 
 # Import functions from download_pdf.py
@@ -22,86 +25,144 @@ except Exception as e:
     raise SystemExit(f"Failed to import download_michigan_pdf from download_pdf.py: {e}")
 
 
-def process_csv(csv_path: str, output_dir: str, skip_existing: bool = True, limit: Optional[int] = None, sleep_seconds: float = 0.0):
-    """Read CSV and call download_michigan_pdf for each row.
+class _Throttle:
+    """Space out download starts by at least `interval` seconds across all workers."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def wait(self):
+        if not self.interval or self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            if delay > 0:
+                print(f"Sleeping for {delay:.2f} seconds...")
+                time.sleep(delay)
+                now = time.monotonic()
+            self._next_start = now + self.interval
+
+
+def _download_one(task: dict, output_dir: str, throttle: _Throttle) -> Optional[str]:
+    """Download a single document described by `task`, returning the saved path or None."""
+    throttle.wait()
+    content_document_id = task['document_id']
+    try:
+        print(f"Downloading document {content_document_id} (agency: {task['document_agency']}, title: {task['document_name']})")
+        out_path = download_michigan_pdf(output_dir=output_dir, **task)
+
+        if out_path:
+            print(f"Saved to: {out_path}")
+        else:
+            print(f"Download returned None for {content_document_id}")
+        return out_path
+
+    except Exception as e:
+        print(f"Error downloading {content_document_id}: {e}")
+        return None
+
+
+def process_csv(csv_path: str, output_dir: str, skip_existing: bool = True, limit: Optional[int] = None, sleep_seconds: float = 0.0, workers: int = 4):
+    """Read CSV and download each listed document using a pool of worker threads.
 
     Parameters:
         csv_path: path to input CSV
         output_dir: directory where PDFs will be saved
         skip_existing: if True and generated_filename present, skip if file exists
         limit: optional max number of rows to process
+        sleep_seconds: minimum spacing between download starts, shared across workers
+        workers: number of concurrent downloads
     """
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"CSV file not found: {csv_path}")
 
     os.makedirs(output_dir, exist_ok=True)
+    # One directory listing up front instead of a stat call per row
+    existing = set(os.listdir(output_dir)) if skip_existing else set()
+    queued = set()
 
     processed = 0
     failed = 0
+    duplicates = 0
+    tasks = []
 
     with open(csv_path, newline='', encoding='utf-8') as fh:
-        reader = csv.DictReader(fh)
+        reader = csv.reader(fh)
+        header = next(reader, [])
+
+        # Resolve column positions once; columns missing from the header point
+        # one past the end, where every row is padded with ''. Only the columns
+        # that reach download_michigan_pdf are read.
+        width = len(header)
+        idx = {name: i for i, name in enumerate(header)}
+        gen_i, agency_name_i, created_date_i, title_i, content_document_id_i = (
+            idx.get(name, width) for name in (
+                'generated_filename', 'agency_name', 'CreatedDate', 'Title', 'ContentDocumentId'))
+
         for row in reader:
-            if limit is not None and processed >= limit:
+            if limit is not None and processed + len(tasks) >= limit:
                 break
-
-            # Extract required fields from the CSV header
-            gen_filename = (row.get('generated_filename') or '').strip()
-            agency_name = (row.get('agency_name') or '').strip()
-            agency_id = (row.get('agency_id') or '').strip()
-            file_ext = (row.get('FileExtension') or '').strip()
-            created_date = (row.get('CreatedDate') or '').strip()
-            title = (row.get('Title') or '').strip()
-            content_body_id = (row.get('ContentBodyId') or '').strip()
-            id_field = (row.get('Id') or '').strip()
-            content_document_id = (row.get('ContentDocumentId') or '').strip()
+            if not row:
+                # Blank line (DictReader skipped these)
+                continue
+            row.extend([''] * (width + 1 - len(row)))
 
             # The download function needs ContentDocumentId (document_id);
             # fill other args from CSV.
+            content_document_id = row[content_document_id_i].strip()
             if not content_document_id:
-                print(f"Skipping row with missing ContentDocumentId: {row}")
+                print(f"Skipping row with missing ContentDocumentId: {dict(zip(header, row))}")
                 failed += 1
                 continue
 
-            # If a generated_filename is provided, optionally skip download when file exists
-            if gen_filename:
-                target_path = os.path.join(output_dir, gen_filename)
-                if skip_existing and os.path.exists(target_path):
-                    print(f"Skipping existing file: {target_path}")
+            gen_filename = row[gen_i].strip()
+            agency_name = row[agency_name_i].strip()
+            created_date = row[created_date_i].strip()
+            title = row[title_i].strip()
+
+            # If a generated_filename is provided, optionally skip download when file exists.
+            # This is checked before submitting so already-downloaded rows never reach a worker.
+            if gen_filename and skip_existing:
+                if gen_filename in existing:
+                    print(f"Skipping existing file: {os.path.join(output_dir, gen_filename)}")
                     processed += 1
                     continue
 
-            try:
-                print(f"Downloading document {content_document_id} (agency: {agency_name}, title: {title})")
-                out_path = download_michigan_pdf(
-                    document_id=content_document_id,
-                    document_agency=agency_name if agency_name else None,
-                    document_name=title if title else None,
-                    document_date=created_date if created_date else None,
-                    output_dir=output_dir
-                )
-
-                if out_path:
-                    print(f"Saved to: {out_path}")
-                else:
-                    print(f"Download returned None for {content_document_id}")
+            # Repeated rows for the same document are only downloaded once (the
+            # saved path is derived from the document id), so two workers never
+            # write the same file
+            if content_document_id in queued:
+                print(f"Skipping duplicate row for document {content_document_id}")
+                duplicates += 1
+                continue
+            queued.add(content_document_id)
+
+            tasks.append({
+                'document_id': content_document_id,
+                'document_agency': agency_name if agency_name else None,
+                'document_name': title if title else None,
+                'document_date': created_date if created_date else None,
+            })
+
+    throttle = _Throttle(sleep_seconds)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(_download_one, task, output_dir, throttle) for task in tasks]
+        try:
+            for future in as_completed(futures):
+                processed += 1
+                if not future.result():
                     failed += 1
-
-            except Exception as e:
-                print(f"Error downloading {content_document_id}: {e}")
-                failed += 1
-
-            processed += 1
-            # Sleep between downloads if requested
-            if sleep_seconds and sleep_seconds > 0:
-                try:
-                    print(f"Sleeping for {sleep_seconds} seconds...")
-                    time.sleep(sleep_seconds)
-                except KeyboardInterrupt:
-                    print("Sleep interrupted by user.")
-                    break
-
-    print(f"Done. Processed: {processed}. Failures: {failed}.")
+        except KeyboardInterrupt:
+            print("Interrupted by user, cancelling pending downloads.")
+            executor.shutdown(wait=False, cancel_futures=True)
+            print(f"Interrupted. Processed: {processed}. Failures: {failed}. Duplicates skipped: {duplicates}.")
+            # Propagate so callers see an aborted run rather than a normal exit
+            raise
+
+    print(f"Done. Processed: {processed}. Failures: {failed}. Duplicates skipped: {duplicates}.")
     return processed, failed
 
 
@@ -112,7 +173,8 @@ if __name__ == '__main__':
     parser.add_argument('--no-skip', dest='skip_existing', action='store_false', help='Do not skip when generated_filename exists')
     parser.add_argument('--limit', type=int, default=None, help='Optional max number of rows to process')
     parser.add_argument('--sleep', dest='sleep_seconds', type=float, default=0.0, help='Seconds to sleep between downloads (float allowed)')
+    parser.add_argument('--workers', type=int, default=4, help='Number of concurrent downloads (default: 4)')
 
     args = parser.parse_args()
 
-    process_csv(args.csv, args.output_dir, skip_existing=args.skip_existing, limit=args.limit, sleep_seconds=args.sleep_seconds)
+    process_csv(args.csv, args.output_dir, skip_existing=args.skip_existing, limit=args.limit, sleep_seconds=args.sleep_seconds, workers=args.workers)
@@ -4,13 +4,28 @@ import urllib3
 import os
 import re
 import argparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# The licensing site is queried with verify=False; silence the warning once here
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# Shared keep-alive session. Throttling (429) and transient server errors are
+# retried with backoff, honouring Retry-After, instead of sleeping between
+# every download.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(max_retries=Retry(
+    total=5,
+    backoff_factor=1.0,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=["POST"],
+    respect_retry_after_header=True,
+)))
 
 def get_content_base_data(document_id):
     """
     POST request to fetch content base data for a given ContentDocumentId.
     """
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
     # Use same base endpoint as other functions; include the query params
     base_url = "https://michildwelfarepubliclicensingsearch.michigan.gov/licagencysrch/webruntime/api/apex/execute?language=en-US&asGuest=true&htmlEncode=false"
 
@@ -36,7 +51,7 @@ def get_content_base_data(document_id):
 
     try:
         print(f"POST getContentBaseData for ContentDocumentId={document_id}")
-        response = requests.post(
+        response = SESSION.post(
             base_url,
             json=payload,
             headers=headers,
@@ -69,9 +84,6 @@ def download_michigan_pdf(document_id, document_agency=None, document_name=None,
         str: Path to the downloaded file if successful, None if failed
     """
 
-    # Disable SSL warnings
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
     # Headers to mimic a real browser
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
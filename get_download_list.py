@@ -4,6 +4,9 @@ import csv
 from datetime import datetime
 import re
 
+# Strips the trailing _YYYY-MM-DD.pdf suffix from downloaded filenames
+DATE_SUFFIX_RE = re.compile(r'_\d{4}-\d{2}-\d{2}\.pdf$')
+
 def get_downloaded_files(download_folder, lower = True):
     all_files = os.listdir(download_folder)
     if lower:
@@ -18,7 +21,7 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     downloaded_files = get_downloaded_files(args.download_folder)
-    downloaded_files_no_date = {re.sub(r'_\d{4}-\d{2}-\d{2}\.pdf$', '', f) for f in downloaded_files if f.endswith('.pdf')}
+    downloaded_files_no_date = {DATE_SUFFIX_RE.sub('', f) for f in downloaded_files if f.endswith('.pdf')}
     expected_files = set()
     expected_files_no_date = set()
     expected_files_info = []  # Store complete row information
@@ -4,6 +4,9 @@ import re
 import argparse
 import csv
 
+# Matches the trailing YYYY-MM-DD date in downloaded PDF filenames
+DATED_PDF_RE = re.compile(r'(\d{4}-\d{2}-\d{2})\.pdf$')
+
 def file_info_to_filename(agency_id, document_name, document_date):
     # Convert file information dictionary to a filename string
 
@@ -21,11 +24,10 @@ def get_output_dir_info(output_dir):
 
     existing_files = os.listdir(output_dir)
     if existing_files:
-        pdf_files = [f for f in existing_files if re.match(r'.*\d{4}-\d{2}-\d{2}\.pdf$', f)]
         # Extract date from filename using regex and find the most recent date
         all_dates = []
-        for f in pdf_files:
-            match = re.search(r'(\d{4}-\d{2}-\d{2})\.pdf$', f)
+        for f in existing_files:
+            match = DATED_PDF_RE.search(f)
             if match:
                 all_dates.append(match.group(1))
         # Get the latest date from the list, parsing as YYYY-MM-DD date
@@ -20,6 +20,20 @@ import glob
 import csv
 import re
 
+# Returns the cell text and agency links of every row in the agency table.
+# Uses the same XPaths as before via document.evaluate, which (unlike
+# querySelectorAll) sees the rows inside lightning-datatable's synthetic shadow DOM.
+ROWS_SCRIPT = """
+const snapshot = (xpath, context) => {
+    const result = document.evaluate(xpath, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    return Array.from({length: result.snapshotLength}, (_, i) => result.snapshotItem(i));
+};
+return snapshot('//lightning-datatable//table/tbody/tr', document).map(r => ({
+    cells: snapshot('./td | ./th', r).map(c => c.innerText.trim()),
+    links: snapshot('.//lightning-formatted-url/a', r).map(a => a.href)
+}));
+"""
+
 ## First get the agency URLs (and ids)
 #def get_agency_information():
 def get_agency_information(driver):
@@ -47,23 +61,12 @@ def get_agency_information(driver):
         table_header.append(text)
 
     while True:
-        # Find the license number rows:
-        # Change this to tr OR th
-        table_rows = driver.find_elements(By.XPATH, "//lightning-datatable//table/tbody/tr")
-        for row in table_rows:
-            # Find all columns (td elements) in the row
-            row_data = []
-            columns = row.find_elements(By.XPATH, "./td | ./th")
-            for col in columns:
-                row_data.append(col.text.strip())
-            table_data.append(row_data)
-
-        for row in table_rows:
-            link_elements = row.find_elements(By.XPATH, ".//lightning-formatted-url/a")
-            for link in link_elements:
-                href = link.get_attribute('href')
-                if href:
-                    sub_urls.append(href)
+        # Scrape the whole page of rows in one browser round-trip rather than
+        # calling find_elements per row and per cell.
+        page_rows = driver.execute_script(ROWS_SCRIPT)
+        for row in page_rows:
+            table_data.append(row['cells'])
+            sub_urls.extend(href for href in row['links'] if href)
 
         try:
             # Try to locate and click the "Next" page button to load the next page of results
@@ -94,8 +97,8 @@ def write_agency_information_to_csv(sub_urls, table_header, table_data, output_d
     csv_filename = f"agency_information_{date_str}.csv"
     csv_file_path = os.path.join(output_dir, csv_filename)
 
-    # Write to CSV file
-    with open(csv_file_path, 'w', newline='', encoding='utf-8') as csvfile:
+    # Write to CSV file through a 1 MiB buffer so large scrapes flush in few writes
+    with open(csv_file_path, 'w', newline='', encoding='utf-8', buffering=1024 * 1024) as csvfile:
        writer = csv.writer(csvfile, quoting=csv.QUOTE_ALL)
        writer.writerow(table_header)  # Write header
        writer.writerows(table_data)  # Write data rows
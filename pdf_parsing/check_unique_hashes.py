@@ -2,8 +2,9 @@
 """Check that all SHA256 hashes across all parquet files are unique."""
 
 import sys
+from collections import Counter
 from pathlib import Path
-import pandas as pd
+import pyarrow.parquet as pq
 
 
 def check_unique_hashes(parquet_dir: Path) -> tuple[bool, dict]:
@@ -27,25 +28,24 @@ def check_unique_hashes(parquet_dir: Path) -> tuple[bool, dict]:
         print(f"  - {f.name}")
     print()
 
-    # Collect all hashes
-    all_hashes = []
+    # Count every hash as it is read
+    hash_counts = Counter()
     file_hash_counts = {}
 
     for parquet_file in parquet_files:
-        df = pd.read_parquet(parquet_file)
-
-        if 'sha256' not in df.columns:
+        if 'sha256' not in pq.read_schema(parquet_file).names:
             print(f"❌ File {parquet_file.name} does not have a 'sha256' column")
             return False, {}
 
-        hashes = df['sha256'].tolist()
-        all_hashes.extend(hashes)
+        # Only the sha256 column is read; the large text column is skipped
+        hashes = pq.read_table(parquet_file, columns=['sha256']).column('sha256').to_pylist()
+        hash_counts.update(hashes)
         file_hash_counts[parquet_file.name] = len(hashes)
         print(f"  {parquet_file.name}: {len(hashes)} hashes")
 
     print()
-    total_hashes = len(all_hashes)
-    unique_hashes = len(set(all_hashes))
+    total_hashes = sum(file_hash_counts.values())
+    unique_hashes = len(hash_counts)
 
     stats = {
         'total_files': len(parquet_files),
@@ -64,11 +64,7 @@ def check_unique_hashes(parquet_dir: Path) -> tuple[bool, dict]:
         duplicates = total_hashes - unique_hashes
         print(f"❌ Found {duplicates} duplicate hash(es)!")
 
-        # Find and report duplicates
-        hash_counts = {}
-        for h in all_hashes:
-            hash_counts[h] = hash_counts.get(h, 0) + 1
-
+        # Report duplicates
         duplicate_hashes = {h: count for h, count in hash_counts.items() if count > 1}
         print(f"\nDuplicate hashes:")
         for hash_val, count in sorted(duplicate_hashes.items()):
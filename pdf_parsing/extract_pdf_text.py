@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """
-Extract text from PDF files using pdfplumber and save to compressed Parquet files.
+Extract text from PDF files using pdfplumber (or, optionally, PyMuPDF) and save
+to compressed Parquet files.
 
 Each PDF is hashed using SHA256, and the output contains:
 - sha256: SHA256 hash of the PDF file
@@ -22,16 +23,38 @@ import os
 import random
 import sys
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
+from itertools import repeat
 from pathlib import Path
 from typing import Dict, Set
 
-import pandas as pd
 import pdfplumber
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:
+    import pymupdf  # optional faster backend
+except ImportError:
+    pymupdf = None
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
+# Sidecar file in the parquet directory caching SHA256 hashes by (path, size, mtime)
+HASH_CACHE_FILENAME = ".sha256_cache.json"
+
+# Schema of the Parquet files written by process_directory
+PARQUET_SCHEMA = pa.schema([
+    ("sha256", pa.string()),
+    ("text", pa.list_(pa.string())),
+    ("dateprocessed", pa.string()),
+])
+
+# Threads used to hash PDFs and read Parquet files; both release the GIL, so reads overlap
+IO_THREADS = 8
+
 
 def calculate_sha256(file_path: str) -> str:
     """Calculate SHA256 hash of a file using file_digest."""
@@ -40,56 +63,145 @@ def calculate_sha256(file_path: str) -> str:
     return digest.hexdigest()
 
 
-def load_processed_ids(parquet_dir: str) -> Set[str]:
-    """Load set of already processed PDF IDs from all Parquet files in output directory."""
-    processed = set()
-    output_path = Path(parquet_dir)
+def load_hash_cache(parquet_dir: str) -> Dict[str, list]:
+    """Load the SHA256 cache, mapping resolved PDF path -> [size, mtime_ns, sha256]."""
+    cache_path = Path(parquet_dir) / HASH_CACHE_FILENAME
+    if not cache_path.exists():
+        return {}
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read hash cache {cache_path}: {e}")
+        return {}
 
-    if not output_path.exists():
-        return processed
 
-    # Find all parquet files in the directory
-    parquet_files = list(output_path.glob("*.parquet"))
+def save_hash_cache(parquet_dir: str, cache: Dict[str, list], pdf_paths: list[Path] = None) -> None:
+    """Write the SHA256 cache atomically next to the Parquet files.
 
-    for parquet_file in parquet_files:
+    If pdf_paths is given, entries for any other path are dropped first so the
+    cache doesn't accumulate deleted or moved PDFs.
+    """
+    if pdf_paths is not None:
+        keep = {str(pdf_path.resolve()) for pdf_path in pdf_paths}
+        for key in cache.keys() - keep:
+            del cache[key]
+
+    cache_path = Path(parquet_dir) / HASH_CACHE_FILENAME
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not write hash cache {cache_path}: {e}")
+
+
+def cached_sha256(pdf_path: Path, cache: Dict[str, list]) -> str:
+    """Return the SHA256 of pdf_path, hashing only if its size or mtime changed."""
+    stat = pdf_path.stat()
+    key = str(pdf_path.resolve())
+    entry = cache.get(key)
+    if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+        return entry[2]
+
+    pdf_hash = calculate_sha256(str(pdf_path))
+    cache[key] = [stat.st_size, stat.st_mtime_ns, pdf_hash]
+    return pdf_hash
+
+
+def hash_pdfs(pdf_paths: list[Path], cache: Dict[str, list] = None) -> list[tuple[str | None, str | None]]:
+    """Hash PDFs on a thread pool, returning (sha256, None) or (None, error) per path, in order.
+
+    If cache is given, hashes are looked up in and added to it via cached_sha256.
+    """
+    def hash_one(pdf_path: Path) -> tuple[str | None, str | None]:
         try:
-            df = pd.read_parquet(parquet_file)
-            if 'sha256' in df.columns:
-                processed.update(df['sha256'].tolist())
+            if cache is not None:
+                return cached_sha256(pdf_path, cache), None
+            return calculate_sha256(str(pdf_path)), None
         except Exception as e:
-            logger.warning(f"Could not read {parquet_file}: {e}")
-            continue
+            return None, str(e)
 
-    return processed
+    with ThreadPoolExecutor(max_workers=IO_THREADS) as executor:
+        return list(executor.map(hash_one, pdf_paths))
 
 
-def load_all_records(parquet_dir: str) -> Dict[str, dict]:
-    """Load all records from Parquet files in output directory, indexed by sha256."""
-    records = {}
+def read_parquet_tables(parquet_dir: str, columns: list[str] = None, filters=None) -> list[pa.Table]:
+    """Read every Parquet file in parquet_dir that has a sha256 column, concurrently.
+
+    Files are read on a thread pool (pyarrow decodes without holding the GIL).
+    Unreadable files are logged and skipped.
+
+    Args:
+        parquet_dir: Directory containing Parquet files
+        columns: Columns to read (default: all)
+        filters: Row filter passed to pq.read_table (default: none)
+    """
     output_path = Path(parquet_dir)
 
     if not output_path.exists():
-        return records
+        return []
 
     # Find all parquet files in the directory
     parquet_files = list(output_path.glob("*.parquet"))
 
-    for parquet_file in parquet_files:
+    def read_one(parquet_file: Path) -> pa.Table | None:
         try:
-            df = pd.read_parquet(parquet_file)
-            for _, row in df.iterrows():
-                record = row.to_dict()
-                if 'sha256' in record:
-                    records[record['sha256']] = record
+            if 'sha256' not in pq.read_schema(parquet_file).names:
+                return None
+            return pq.read_table(parquet_file, columns=columns, filters=filters)
         except Exception as e:
             logger.warning(f"Could not read {parquet_file}: {e}")
-            continue
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(IO_THREADS, len(parquet_files)))) as executor:
+        return [table for table in executor.map(read_one, parquet_files) if table is not None]
+
+
+def load_processed_ids(parquet_dir: str) -> Set[str]:
+    """Load set of already processed PDF IDs from all Parquet files in output directory."""
+    processed = set()
+
+    # Only the sha256 column is decoded; the text column is never read
+    for table in read_parquet_tables(parquet_dir, columns=['sha256']):
+        processed.update(table.column('sha256').to_pylist())
+
+    return processed
+
+
+def load_records(parquet_dir: str, sha256s: Set[str] = None) -> Dict[str, dict]:
+    """Load records from Parquet files in output directory, indexed by sha256.
+
+    If sha256s is given, only those records are read (filtered in pyarrow, so
+    the text of every other record is never materialised).
+    """
+    records = {}
+    filters = [('sha256', 'in', list(sha256s))] if sha256s is not None else None
+
+    # to_pylist builds plain dicts (with text as a list) without going through pandas rows
+    for table in read_parquet_tables(parquet_dir, filters=filters):
+        for record in table.to_pylist():
+            records[record['sha256']] = record
 
     return records
 
 
-def extract_text_from_pdf(pdf_path: str) -> list[str]:
-    """Extract text from PDF, returning a list of strings (one per page)."""
+def extract_text_from_pdf(pdf_path: str, backend: str = "pdfplumber") -> list[str]:
+    """Extract text from PDF, returning a list of strings (one per page).
+
+    Args:
+        pdf_path: Path to the PDF file
+        backend: "pdfplumber" (default) or "pymupdf". PyMuPDF is much faster but
+            its text layout differs, so records from one backend will not
+            spot check against the other.
+    """
+    if backend == "pymupdf":
+        if pymupdf is None:
+            raise ImportError("The pymupdf backend requires PyMuPDF (pip install pymupdf)")
+        with pymupdf.open(pdf_path) as doc:
+            return [page.get_text("text") or "" for page in doc]
+
     pages_text = []
     with pdfplumber.open(pdf_path) as pdf:
         for page in pdf.pages:
@@ -110,13 +222,25 @@ def format_time(seconds: float) -> str:
         return f"{hours:.1f}h"
 
 
-def process_directory(pdf_dir: str, parquet_dir: str, limit: int = None) -> None:
+def _extract_pages(pdf_path: str, backend: str) -> tuple[list[str] | None, str | None]:
+    """Worker entry point: extract pages, returning (pages, None) or (None, error message)."""
+    try:
+        return extract_text_from_pdf(pdf_path, backend=backend), None
+    except Exception as e:
+        return None, str(e)
+
+
+def process_directory(pdf_dir: str, parquet_dir: str, limit: int = None, backend: str = "pdfplumber",
+                      workers: int = None, flush_every: int = 100) -> None:
     """Process all PDFs in directory and save results to timestamped Parquet file.
 
     Args:
         pdf_dir: Directory containing PDF files
         parquet_dir: Output directory for Parquet files
-        limit: Maximum number of PDFs to process (excludes already-processed/skipped files)
+        limit: Maximum number of PDFs to extract successfully (already-processed and failed files don't count)
+        backend: Text extraction backend passed to extract_text_from_pdf
+        workers: Number of extraction processes (default: os.cpu_count())
+        flush_every: Number of records buffered before each write to the Parquet file
     """
     pdf_dir_path = Path(pdf_dir)
 
@@ -137,25 +261,40 @@ def process_directory(pdf_dir: str, parquet_dir: str, limit: int = None) -> None
     logger.info(f"Found {len(processed_ids)} already processed PDFs across existing Parquet files")
 
     # Find all PDF files
-    pdf_files = list(pdf_dir_path.glob("*.pdf")) + list(pdf_dir_path.glob("*.PDF"))
+    pdf_files = sorted(list(pdf_dir_path.glob("*.pdf")) + list(pdf_dir_path.glob("*.PDF")))
     logger.info(f"Found {len(pdf_files)} PDF files in directory")
 
-    # Count how many actually need processing by checking which ones are already done
-    new_files_count = 0
-    for pdf_path in pdf_files:
-        try:
-            pdf_hash = calculate_sha256(str(pdf_path))
-            if pdf_hash not in processed_ids:
-                new_files_count += 1
-        except Exception:
-            # If we can't hash it, count it as needing processing
-            new_files_count += 1
+    # Hash every PDF once and keep the ones that still need processing. Unchanged
+    # files (same path, size and mtime) reuse their cached hash without being opened.
+    hash_cache = load_hash_cache(parquet_dir)
+    hashes = hash_pdfs(pdf_files, hash_cache)
+    save_hash_cache(parquet_dir, hash_cache, pdf_files)
 
-    to_process_count = new_files_count
+    pending = []
+    skipped_count = 0
+    error_count = 0
+    for idx, (pdf_path, (pdf_hash, error)) in enumerate(zip(pdf_files, hashes), 1):
+        if error is not None:
+            logger.error(f"Error hashing {pdf_path.name}: {error}")
+            error_count += 1
+            continue
+
+        if pdf_hash in processed_ids:
+            logger.info(f"[{idx}/{len(pdf_files)}] Skipping (already processed): {pdf_path.name}")
+            skipped_count += 1
+            continue
+
+        # Add to processed_ids to prevent duplicates within the same batch
+        processed_ids.add(pdf_hash)
+        pending.append((pdf_path, pdf_hash))
 
-    # Apply limit if specified
+    new_files_count = len(pending)
+
+    # Apply limit if specified. It caps successful extractions, so files are fed
+    # to the pool until that many have succeeded rather than truncating pending.
+    to_process_count = new_files_count
     if limit is not None:
-        to_process_count = min(to_process_count, limit)
+        to_process_count = min(limit, new_files_count)
         logger.info(f"Found {new_files_count} new PDFs, will process up to {to_process_count} (limit: {limit})")
     else:
         logger.info(f"Found {new_files_count} new PDFs to process")
@@ -167,69 +306,99 @@ def process_directory(pdf_dir: str, parquet_dir: str, limit: int = None) -> None
     # Generate timestamped filename for this batch
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_parquet = output_path / f"{timestamp}_pdf_text.parquet"
-
-    # Collect all records for this batch
-    records = []
+    # Written under a name that doesn't match *.parquet and renamed once closed:
+    # a Parquet file has no footer until then, so readers must never see it early
+    partial_parquet = output_parquet.with_name(output_parquet.name + ".partial")
+
+    # Records are buffered and written as a row group every flush_every records,
+    # so an exception or Ctrl-C still saves everything extracted so far. A hard
+    # kill (SIGKILL, OOM, power loss) leaves only the unreadable .partial file.
+    batch = []
+    writer = None
+    saved_count = 0
     processed_count = 0
-    skipped_count = 0
-    error_count = 0
     start_time = time.time()
 
-    for idx, pdf_path in enumerate(sorted(pdf_files), 1):
-        try:
-            # Calculate SHA256 hash
-            pdf_hash = calculate_sha256(str(pdf_path))
-
-            # Skip if already processed
-            if pdf_hash in processed_ids:
-                logger.info(f"[{idx}/{len(pdf_files)}] Skipping (already processed): {pdf_path.name}")
-                skipped_count += 1
-                continue
-
-            # Check if we've hit the limit
-            if limit is not None and processed_count >= limit:
-                logger.info(f"Reached processing limit of {limit} PDFs, stopping")
-                break
-
-            # Extract text
-            logger.info(f"[{idx}/{len(pdf_files)}] Processing: {pdf_path.name}")
-            pages_text = extract_text_from_pdf(str(pdf_path))
-
-            # Create record with timestamp
-            record = {
-                "sha256": pdf_hash,
-                "text": pages_text,  # List of strings, one per page
-                "dateprocessed": datetime.now().isoformat()
-            }
-
-            records.append(record)
-            processed_count += 1
-
-            # Add to processed_ids to prevent duplicates within the same batch
-            processed_ids.add(pdf_hash)
-
-            # Calculate time estimates
-            elapsed_time = time.time() - start_time
-            avg_time_per_pdf = elapsed_time / processed_count
-            remaining = to_process_count - processed_count
-            estimated_remaining = avg_time_per_pdf * remaining
-
-            elapsed_str = format_time(elapsed_time)
-            remaining_str = format_time(estimated_remaining)
-
-            logger.info(f"  -> Processed {len(pages_text)} pages")
-            logger.info(f"  -> Time: {elapsed_str} elapsed, ~{remaining_str} remaining (est.)")
-
-        except Exception as e:
-            logger.error(f"Error processing {pdf_path.name}: {e}")
-            error_count += 1
-            continue
-
-    # Save all records to Parquet file with compression
-    if records:
-        df = pd.DataFrame(records)
-        df.to_parquet(output_parquet, compression='zstd', index=False)
-        logger.info(f"Saved {len(records)} records to {output_parquet}")
+    def flush_batch():
+        nonlocal writer, saved_count
+        if not batch:
+            return
+        if writer is None:
+            writer = pq.ParquetWriter(partial_parquet, PARQUET_SCHEMA, compression='zstd')
+        writer.write_table(pa.Table.from_pylist(batch, schema=PARQUET_SCHEMA))
+        saved_count += len(batch)
+        logger.debug(f"Flushed {len(batch)} records to {partial_parquet}")
+        batch.clear()
+
+    workers = workers or os.cpu_count() or 1
+    logger.info(f"Extracting text with {workers} worker process(es)")
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Keep a bounded, ordered window of submitted files. With a limit, only
+            # as many are in flight as could still be needed to reach it, and a
+            # failed file frees its slot for the next pending one.
+            pending_iter = iter(pending)
+            in_flight = deque()
+
+            def fill():
+                while len(in_flight) < 2 * workers:
+                    if limit is not None and processed_count + len(in_flight) >= limit:
+                        return
+                    item = next(pending_iter, None)
+                    if item is None:
+                        return
+                    in_flight.append((item, executor.submit(_extract_pages, str(item[0]), backend)))
+
+            fill()
+            done = 0
+            while in_flight:
+                (pdf_path, pdf_hash), future = in_flight.popleft()
+                pages_text, error = future.result()
+                done += 1
+                if error is not None:
+                    logger.error(f"Error processing {pdf_path.name}: {error}")
+                    error_count += 1
+                    # Under a limit the failure is replaced by another attempt
+                    if limit is not None and to_process_count < new_files_count:
+                        to_process_count += 1
+                    fill()
+                    continue
+
+                # Create record with timestamp
+                record = {
+                    "sha256": pdf_hash,
+                    "text": pages_text,  # List of strings, one per page
+                    "dateprocessed": datetime.now().isoformat()
+                }
+
+                batch.append(record)
+                processed_count += 1
+                if len(batch) >= flush_every:
+                    flush_batch()
+
+                # Calculate time estimates
+                elapsed_time = time.time() - start_time
+                avg_time_per_pdf = elapsed_time / done
+                remaining = max(to_process_count - done, 0)
+                estimated_remaining = avg_time_per_pdf * remaining
+
+                elapsed_str = format_time(elapsed_time)
+                remaining_str = format_time(estimated_remaining)
+
+                logger.info(f"[{done}/{to_process_count}] Processed: {pdf_path.name}")
+                logger.info(f"  -> Processed {len(pages_text)} pages")
+                logger.info(f"  -> Time: {elapsed_str} elapsed, ~{remaining_str} remaining (est.)")
+                fill()
+    finally:
+        # Save whatever is buffered, even if extraction was interrupted
+        flush_batch()
+        if writer is not None:
+            writer.close()
+            os.replace(partial_parquet, output_parquet)
+
+    if saved_count:
+        logger.info(f"Saved {saved_count} records to {output_parquet}")
     else:
         logger.info("No new records to save")
 
@@ -239,7 +408,8 @@ def process_directory(pdf_dir: str, parquet_dir: str, limit: int = None) -> None
     logger.info(f"  Errors: {error_count}")
 
 
-def spot_check(pdf_dir: str, parquet_dir: str, num_checks: int) -> None:
+def spot_check(pdf_dir: str, parquet_dir: str, num_checks: int, backend: str = "pdfplumber",
+               workers: int = None) -> None:
     """Spot check existing records by re-extracting and comparing."""
     pdf_dir_path = Path(pdf_dir)
 
@@ -251,27 +421,25 @@ def spot_check(pdf_dir: str, parquet_dir: str, num_checks: int) -> None:
         logger.error(f"'{pdf_dir}' is not a directory")
         sys.exit(1)
 
-    # Load all existing records from Parquet files
+    # Load only the hashes of existing records; text is read for the sample below
     logger.info(f"Loading existing records from {parquet_dir}...")
-    records = load_all_records(parquet_dir)
-    logger.info(f"Loaded {len(records)} existing records")
+    processed_ids = load_processed_ids(parquet_dir)
+    logger.info(f"Loaded {len(processed_ids)} existing records")
 
-    if len(records) == 0:
+    if len(processed_ids) == 0:
         logger.info("No records to spot check!")
         return
 
     # Find all PDF files
     pdf_files = list(pdf_dir_path.glob("*.pdf")) + list(pdf_dir_path.glob("*.PDF"))
 
-    # Filter to only PDFs we have records for
+    # Filter to only PDFs we have records for, reusing cached hashes where possible
+    hash_cache = load_hash_cache(parquet_dir)
     pdf_files_with_records = []
-    for pdf_path in pdf_files:
-        try:
-            pdf_hash = calculate_sha256(str(pdf_path))
-            if pdf_hash in records:
-                pdf_files_with_records.append((pdf_path, pdf_hash))
-        except Exception:
-            continue
+    for pdf_path, (pdf_hash, error) in zip(pdf_files, hash_pdfs(pdf_files, hash_cache)):
+        if pdf_hash in processed_ids:
+            pdf_files_with_records.append((pdf_path, pdf_hash))
+    save_hash_cache(parquet_dir, hash_cache, pdf_files)
 
     if len(pdf_files_with_records) == 0:
         logger.info("No PDFs found that match existing records!")
@@ -280,18 +448,25 @@ def spot_check(pdf_dir: str, parquet_dir: str, num_checks: int) -> None:
     # Sample up to num_checks PDFs
     sample_size = min(num_checks, len(pdf_files_with_records))
     sample = random.sample(pdf_files_with_records, sample_size)
+    records = load_records(parquet_dir, {pdf_hash for _, pdf_hash in sample})
 
     logger.info(f"Spot checking {sample_size} PDFs...")
 
     passed = 0
     failed = 0
 
-    for pdf_path, pdf_hash in sample:
-        try:
+    # Re-extract the sample in parallel; results come back in sample order
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(_extract_pages, [str(pdf_path) for pdf_path, _ in sample], repeat(backend))
+
+        for (pdf_path, pdf_hash), (pages_text, error) in zip(sample, results):
             logger.info(f"Checking: {pdf_path.name}")
 
-            # Re-extract text
-            pages_text = extract_text_from_pdf(str(pdf_path))
+            if error is not None:
+                logger.error(f"  ✗ ERROR: {error}")
+                failed += 1
+                continue
 
             # Get existing record
             existing_record = records[pdf_hash]
@@ -311,10 +486,6 @@ def spot_check(pdf_dir: str, parquet_dir: str, num_checks: int) -> None:
                             logger.error(f"    Page {i+1} differs")
                 failed += 1
 
-        except Exception as e:
-            logger.error(f"  ✗ ERROR: {e}")
-            failed += 1
-
     logger.info("Spot Check Summary:")
     logger.info(f"  Passed: {passed}/{sample_size}")
     logger.info(f"  Failed: {failed}/{sample_size}")
@@ -351,7 +522,27 @@ def main():
         "--limit",
         type=int,
         metavar="N",
-        help="Process at most N PDFs (skipped files don't count toward limit)"
+        help="Process at most N PDFs successfully (skipped and failed files don't count toward limit)"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["pdfplumber", "pymupdf"],
+        default="pdfplumber",
+        help="Text extraction backend (default: pdfplumber). pymupdf is faster but requires PyMuPDF "
+             "and produces text that will not match records extracted with pdfplumber"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="Number of worker processes used for text extraction (default: CPU count)"
+    )
+    parser.add_argument(
+        "--flush-every",
+        type=int,
+        default=100,
+        metavar="N",
+        help="Write buffered records to the Parquet file every N PDFs (default: 100)"
     )
     parser.add_argument(
         "--verbose",
@@ -368,9 +559,10 @@ def main():
     )
 
     if args.spot_check is not None:
-        spot_check(args.pdf_dir, args.parquet_dir, args.spot_check)
+        spot_check(args.pdf_dir, args.parquet_dir, args.spot_check, backend=args.backend, workers=args.workers)
     else:
-        process_directory(args.pdf_dir, args.parquet_dir, limit=args.limit)
+        process_directory(args.pdf_dir, args.parquet_dir, limit=args.limit, backend=args.backend,
+                          workers=args.workers, flush_every=args.flush_every)
 
 
 if __name__ == "__main__":
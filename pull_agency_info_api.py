@@ -4,12 +4,36 @@ import json
 import urllib.parse
 import urllib3
 import argparse
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import repeat
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# One pooled session for every call so requests to the licensing API reuse a
+# keep-alive connection instead of a fresh TCP+TLS handshake each time.
+# getContentDetails is a read-only POST, so POST is retried on throttling too.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "POST"],
+        respect_retry_after_header=True,
+    ),
+))
+
+logger = logging.getLogger(__name__)
+
+# The licensing site is queried with verify=False; silence the warning once here
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 def get_all_agency_info():
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
     base_url = "https://michildwelfarepubliclicensingsearch.michigan.gov/licagencysrch/webruntime/api/apex/execute"
 
     params = {
@@ -33,7 +57,7 @@ def get_all_agency_info():
 
     try:
         print("GET request with recordId=null")
-        response = requests.get(base_url, params=params, headers=headers, verify=False, timeout=30)
+        response = SESSION.get(base_url, params=params, headers=headers, verify=False, timeout=30)
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -44,8 +68,6 @@ def get_agency_details(record_id):
     """
     GET request with URL parameters directly to the API endpoint
     """
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
     base_url = "https://michildwelfarepubliclicensingsearch.michigan.gov/licagencysrch/webruntime/api/apex/execute"
 
     # Build the exact URL from your example
@@ -69,8 +91,8 @@ def get_agency_details(record_id):
     }
 
     try:
-        print("Method 1: GET request with URL parameters")
-        response = requests.get(base_url, params=params, headers=headers, verify=False, timeout=30)
+        logger.debug("Method 1: GET request with URL parameters")
+        response = SESSION.get(base_url, params=params, headers=headers, verify=False, timeout=30)
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -82,8 +104,6 @@ def get_content_details_method(record_id):
     """
     POST with JSON payload directly to the API endpoint
     """
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
     base_url = "https://michildwelfarepubliclicensingsearch.michigan.gov/licagencysrch/webruntime/api/apex/execute"
 
     # JSON payload
@@ -108,10 +128,10 @@ def get_content_details_method(record_id):
     }
 
     try:
-        print("POST with JSON payload directly to the API endpoint")
-        print(f"Payload: {json.dumps(payload, indent=2)}")
+        logger.debug("POST with JSON payload directly to the API endpoint")
+        logger.debug("Payload: %s", payload)
 
-        response = requests.post(
+        response = SESSION.post(
             base_url,
             json=payload,
             headers=headers,
@@ -181,23 +201,59 @@ def merge_agency_info(agency_csv, output_dir = ".", remove_files=False):
                 print(f"Removed file: {json_path}")
     return combined_csv
 
+def save_content_details(record_id, output_dir, keep_cols):
+    """
+    Fetch the PDF content details for one agency and write them to JSON and CSV.
+    """
+    print(f"Processing agency ID: {record_id}")
+    pdf_results = get_content_details_method(record_id)
+
+    if pdf_results:
+        print(f"PDF Content Details for {record_id}:")
+        # print(json.dumps(pdf_results, indent=2))
+        # Save full JSON response to file
+        # Compact JSON: these per-agency files are intermediate and removed after merging by default
+        json_file = os.path.join(output_dir, f"{record_id}_pdf_content_details.json")
+        with open(json_file, "w", encoding="utf-8") as jf:
+            json.dump(pdf_results, jf, separators=(",", ":"), ensure_ascii=False)
+        print(f"Full JSON results written to {json_file}")
+
+        # Write top-level keys/values to CSV
+        csv_file = os.path.join(output_dir, f"{record_id}_pdf_content_details.csv")
+        with open(csv_file, mode='w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            # Write the header
+            writer.writerow(['agency_id', *keep_cols])
+            writer.writerows(
+                [record_id, *(p.get(k, "") for k in keep_cols)]
+                for p in pdf_results.get('returnValue', {}).get('contentVersionRes', [])
+            )
+
+        print(f"Top-level JSON results written to {csv_file}")
+    else:
+        print(f"Failed to retrieve PDF content details for agency ID: {record_id}")
+
 # Test the functions
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Download Child Welfare Licensing agency PDFs from Michigan's public licensing search.")
     parser.add_argument("--output-dir", dest="output_dir", help="Directory to save the CSV and JSON files", default="./")
     parser.add_argument("--overwrite", dest="overwrite", help="Overwrite existing files", default=True)
     parser.add_argument("--remove-files", dest="remove_files", help="Remove individual agency files after merging", default=True)
+    parser.add_argument("--workers", dest="workers", type=int, default=4, help="Number of concurrent content detail requests (default: 4)")
     parser.add_argument("--verbose", dest="verbose", help="Enable verbose output", default=False, action='store_true')
     args = parser.parse_args()
     output_dir = args.output_dir
 
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format='%(message)s')
+
     # # Patch all print statements in functions
     # builtins.print = lambda *a, **kw: log_print(' '.join(str(x) for x in a), logging.INFO)
 
     os.makedirs(output_dir, exist_ok=True)
 
     all_agency_info = get_all_agency_info()
-    print(json.dumps(all_agency_info, indent=2))
+    if args.verbose:
+        print(json.dumps(all_agency_info, indent=2))
     date_str = datetime.now().strftime("%Y-%m-%d")
     agency_file = os.path.join(output_dir, f"{date_str}_all_agency_info.json")
 
@@ -235,14 +291,14 @@ if __name__ == "__main__":
     with open(agency_csv_file, mode='w', newline='', encoding='utf-8') as f:
         writer = csv.DictWriter(f, fieldnames=keep_cols, quoting=csv.QUOTE_ALL)
         writer.writeheader()
-        for agency in agency_list:
-            row = {col: agency.get(col, "") for col in keep_cols}
-            writer.writerow(row)
+        writer.writerows({col: agency.get(col, "") for col in keep_cols} for agency in agency_list)
     print(f"Agency info written to {agency_csv_file}")
 
-    keep_cols = ['FileExtension', 'CreatedDate', 'Title', 'ContentBodyId', 'Id', 'ContentDocumentId']
+    keep_cols = ('FileExtension', 'CreatedDate', 'Title', 'ContentBodyId', 'Id', 'ContentDocumentId')
 
-    # Run for each agency id
+    # Collect the agencies to fetch, then run the requests on a small thread pool;
+    # each call is an independent network wait on the shared SESSION.
+    record_ids = []
     for agency in agency_list:
         record_id = agency.get('agencyId')
         csv_file = os.path.join(output_dir, f"{record_id}_pdf_content_details.csv")
@@ -252,31 +308,9 @@ if __name__ == "__main__":
         if args.overwrite and os.path.exists(csv_file):
             print(f"File {csv_file} already exists and overwrite is enabled, skipping agency ID {record_id}.")
             continue
+        record_ids.append(record_id)
 
-        print(f"Processing agency ID: {record_id}")
-        pdf_results = get_content_details_method(record_id)
-
-        if pdf_results:
-            print(f"PDF Content Details for {record_id}:")
-            # print(json.dumps(pdf_results, indent=2))
-            # Save full JSON response to file
-            json_file = os.path.join(output_dir, f"{record_id}_pdf_content_details.json")
-            with open(json_file, "w", encoding="utf-8") as jf:
-                json.dump(pdf_results, jf, indent=2, ensure_ascii=False)
-            print(f"Full JSON results written to {json_file}")
-
-            # Write top-level keys/values to CSV
-            csv_file = os.path.join(output_dir, f"{record_id}_pdf_content_details.csv")
-            with open(csv_file, mode='w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f, quoting=csv.QUOTE_ALL)
-                # Write the header
-                writer.writerow(['agency_id'] + keep_cols)
-                for p in pdf_results.get('returnValue', {}).get('contentVersionRes', []):
-                    row_data = [record_id] + [p.get(k, "") for k in keep_cols]
-                    writer.writerow(row_data)
-
-            print(f"Top-level JSON results written to {csv_file}")
-        else:
-            print(f"Failed to retrieve PDF content details for agency ID: {record_id}")
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        list(executor.map(save_content_details, record_ids, repeat(output_dir), repeat(keep_cols)))
 
     merge_agency_info(agency_csv_file, output_dir, remove_files=args.remove_files)
\ No newline at end of file